@@ -26,28 +26,41 @@ Date: 2025-09-20
 import sys
 import os
 import argparse
+import asyncio
+import atexit
 import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
 from datetime import datetime
 
 # Add src directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.data_fetcher import HKODataFetcher
-from src.visualizer import RainfallVisualizer
-from src.dashboard import RainfallDashboard
-from src.real_time_updater import RealTimeUpdater
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('hk_rainfall_monitor.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+def setup_logging():
+    """Configure logging once the mode is known.
+    
+    Callers only enqueue records; a background listener does the I/O, and
+    file writes are batched until an error forces a flush.
+    """
+    log_queue = queue.Queue(-1)
+    file_handler = MemoryHandler(
+        capacity=1024,
+        flushLevel=logging.ERROR,
+        target=logging.FileHandler('hk_rainfall_monitor.log', delay=True)
+    )
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[QueueHandler(log_queue)],
+        force=True  # src modules may already have configured the root logger
+    )
+    log_listener = QueueListener(log_queue, file_handler, logging.StreamHandler())
+    log_listener.start()
+    atexit.register(log_listener.stop)
+
 def print_banner():
     """Print application banner."""
     banner = """
@@ -64,6 +77,8 @@ def print_banner():
 
 def run_dashboard_mode(args):
     """Run the interactive web dashboard."""
+    from src.dashboard import RainfallDashboard
+    
     print("🚀 Starting Interactive Web Dashboard...")
     print(f"   Host: {args.host}")
     print(f"   Port: {args.port}")
@@ -97,6 +112,8 @@ def run_dashboard_mode(args):
 
 def run_updater_mode(args):
     """Run background data updater only."""
+    from src.real_time_updater import RealTimeUpdater
+    
     print("🔄 Starting Background Data Updater...")
     print(f"   Update interval: {args.interval} minutes")
     print()
@@ -113,10 +130,11 @@ def run_updater_mode(args):
         print("⚡ Press Ctrl+C to stop the updater")
         print("=" * 50)
         
-        # Keep running
-        import time
+        # Print a status line whenever the updater stores new data
         while True:
-            time.sleep(30)
+            if not updater.data_ready.wait(timeout=60):
+                continue
+            updater.data_ready.clear()
             latest_data = updater.get_latest_data()
             if latest_data:
                 rainfall_avg = latest_data.get('rainfall_data', {}).get('average_rainfall', 0)
@@ -132,16 +150,22 @@ def run_updater_mode(args):
 
 def run_test_mode(args):
     """Run data fetching and visualization tests."""
+    from src.data_fetcher import get_fetcher
+    from src.visualizer import get_visualizer
+    
     print("🧪 Running Data Fetching Tests...")
     print("=" * 50)
     
     try:
         # Test data fetcher
         print("1️⃣ Testing HKO Data Fetcher...")
-        fetcher = HKODataFetcher()
+        fetcher = get_fetcher()
+        
+        # Issue the three HKO requests concurrently
+        all_data = asyncio.run(fetcher.fetch_all_data_async())
         
         print("   📡 Fetching current weather...")
-        current_weather = fetcher.fetch_current_weather()
+        current_weather = all_data['current_weather']
         if 'error' not in current_weather:
             temp = current_weather.get('temperature', 'N/A')
             humidity = current_weather.get('humidity', 'N/A')
@@ -150,7 +174,7 @@ def run_test_mode(args):
             print(f"   ❌ Error: {current_weather['error']}")
         
         print("   🌧️ Fetching rainfall data...")
-        rainfall_data = fetcher.fetch_rainfall_data()
+        rainfall_data = all_data['rainfall_data']
         if 'error' not in rainfall_data:
             regions = len(rainfall_data.get('regions', {}))
             avg_rain = rainfall_data.get('average_rainfall', 0)
@@ -159,7 +183,7 @@ def run_test_mode(args):
             print(f"   ❌ Error: {rainfall_data['error']}")
         
         print("   ⚠️ Fetching weather warnings...")
-        warnings = fetcher.fetch_weather_warnings()
+        warnings = all_data['weather_warnings']
         if 'error' not in warnings:
             active_warnings = len(warnings.get('active_warnings', []))
             print(f"   ✅ {active_warnings} active warnings")
@@ -168,7 +192,7 @@ def run_test_mode(args):
         
         # Test visualizer
         print("\\n2️⃣ Testing Visualization Components...")
-        visualizer = RainfallVisualizer()
+        visualizer = get_visualizer()
         
         if 'error' not in rainfall_data:
             print("   📊 Creating bar chart...")
@@ -193,41 +217,57 @@ def run_test_mode(args):
 
 def run_visualize_mode(args):
     """Create static visualizations from current data."""
+    from src.data_fetcher import HK_DISTRICTS, get_fetcher
+    from src.visualizer import get_visualizer
+    
     print("📊 Creating Static Visualizations...")
     print("=" * 50)
     
     try:
         # Fetch current data
         print("📡 Fetching latest data from HKO...")
-        fetcher = HKODataFetcher()
-        all_data = fetcher.fetch_all_data()
+        fetcher = get_fetcher()
+        all_data = asyncio.run(fetcher.fetch_all_data_async())
         
         # Create visualizations
         print("🎨 Creating visualizations...")
-        visualizer = RainfallVisualizer()
+        visualizer = get_visualizer()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         # Bar chart
         print("   📊 Rainfall bar chart...")
         bar_chart = visualizer.create_rainfall_bar_chart(all_data['rainfall_data'])
-        visualizer.save_interactive_chart(bar_chart, f"rainfall_chart_{timestamp}.html")
-        visualizer.save_static_chart(bar_chart, f"rainfall_chart_{timestamp}.png")
         
         # Map
         print("   🗺️ Rainfall distribution map...")
         rainfall_map = visualizer.create_rainfall_map(
-            all_data['rainfall_data'], all_data['district_coordinates'])
-        visualizer.save_map(rainfall_map, f"rainfall_map_{timestamp}.html")
+            all_data['rainfall_data'], HK_DISTRICTS)
         
         # Dashboard
         print("   📈 Weather dashboard...")
         dashboard_chart = visualizer.create_weather_dashboard(all_data)
-        visualizer.save_interactive_chart(dashboard_chart, f"weather_dashboard_{timestamp}.html")
-        visualizer.save_static_chart(dashboard_chart, f"weather_dashboard_{timestamp}.png")
         
-        # Save raw data
-        print("   💾 Saving raw data...")
-        fetcher.save_data_to_file(all_data, f"visualization_data_{timestamp}.json")
+        # Save all outputs concurrently; static image export dominates and
+        # the writes are independent of each other
+        print("   💾 Saving files...")
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {
+                executor.submit(visualizer.save_interactive_chart, bar_chart,
+                                f"rainfall_chart_{timestamp}.html"): "Bar chart (HTML)",
+                executor.submit(visualizer.save_static_chart, bar_chart,
+                                f"rainfall_chart_{timestamp}.png"): "Bar chart (PNG)",
+                executor.submit(visualizer.save_map, rainfall_map,
+                                f"rainfall_map_{timestamp}.html"): "Rainfall map",
+                executor.submit(visualizer.save_interactive_chart, dashboard_chart,
+                                f"weather_dashboard_{timestamp}.html"): "Weather dashboard (HTML)",
+                executor.submit(visualizer.save_static_chart, dashboard_chart,
+                                f"weather_dashboard_{timestamp}.png"): "Weather dashboard (PNG)",
+                executor.submit(fetcher.save_data_to_file, all_data,
+                                f"visualization_data_{timestamp}.json"): "Raw data"
+            }
+            for future in as_completed(futures):
+                status = "✅" if future.result() else "❌"
+                print(f"      {status} {futures[future]}")
         
         print("\\n✅ Visualizations created successfully!")
         print("📁 Files saved to 'output/' directory:")
@@ -280,6 +320,8 @@ Examples:
     
     args = parser.parse_args()
     
+    setup_logging()
+    
     # Print banner
     print_banner()
     
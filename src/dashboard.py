@@ -4,21 +4,217 @@ This module creates a real-time web dashboard using Dash.
 """
 
 import dash
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, State, Patch, callback, ctx
 import dash_bootstrap_components as dbc
+from flask_compress import Compress
 import plotly.graph_objects as go
 import pandas as pd
 import json
 import os
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
 from datetime import datetime, timedelta
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from data_fetcher import HKODataFetcher
-from visualizer import RainfallVisualizer
+from visualizer import get_visualizer
+from real_time_updater import RealTimeUpdater
 
 logger = logging.getLogger(__name__)
 
+def _unpack(data: Dict) -> Tuple[Dict, Dict, Dict]:
+    """Split a data payload into (current_weather, rainfall_data, weather_warnings)."""
+    return (data.get('current_weather') or {},
+            data.get('rainfall_data') or {},
+            data.get('weather_warnings') or {})
+
+def _fetch_epoch(data: Dict) -> float:
+    """Return a payload's fetch time as epoch seconds."""
+    epoch = data.get('fetch_time_epoch')
+    if epoch is not None:
+        return epoch
+    
+    # Payloads stored before fetch_time_epoch existed only carry fetch_time
+    fetch_time = data['fetch_time']
+    if isinstance(fetch_time, str):
+        fetch_time = datetime.fromisoformat(fetch_time)
+    return fetch_time.timestamp()
+
+def _history_update(records: List[Dict], synced: Optional[Dict]) -> Tuple[object, Dict]:
+    """Return the historical-store update and sync state for a client holding synced.
+    
+    synced describes the client's samples as {'first', 'last', 'n'}. While those are
+    still a run of the updater's records, the client receives a Patch that drops the
+    expired samples and appends every newer fetch; otherwise it receives the full
+    timestamp/value arrays.
+    """
+    epochs = [_fetch_epoch(item['data']) for item in records]
+    averages = [item['data'].get('rainfall_data', {}).get('average_rainfall', 0) for item in records]
+    sync = {'first': epochs[0], 'last': epochs[-1], 'n': len(epochs)}
+    
+    last = bisect_left(epochs, synced['last']) if synced else len(epochs)
+    if last < len(epochs) and epochs[last] == synced['last']:
+        # The client's samples up to synced['last'] are either still in the
+        # window or older than all of it
+        first = bisect_left(epochs, synced['first'])
+        expired = synced['n'] - (last + 1 - first)
+        if (expired == 0 and epochs[first] == synced['first']
+                or expired > 0 and synced['first'] < epochs[0]):
+            patch = Patch()
+            for _ in range(expired):
+                del patch['t'][0]
+                del patch['avg'][0]
+            patch['t'].extend(epochs[last + 1:])
+            patch['avg'].extend(averages[last + 1:])
+            return patch, sync
+    
+    return {'t': epochs, 'avg': averages}, sync
+
+@lru_cache(maxsize=1)
+def _static_layout_rows() -> tuple:
+    """Build the static part of the layout once and share it across dashboards.
+    
+    Only the Interval and Store components depend on the dashboard instance,
+    so everything else is constructed on first use and reused afterwards.
+    """
+    return (
+        # Header
+        dbc.Row([
+            dbc.Col([
+                html.H1("香港降雨實時監測 Hong Kong Rainfall Monitor", 
+                       className="text-center mb-4",
+                       style={'color': '#2c3e50', 'fontWeight': 'bold'}),
+                html.Hr()
+            ], width=12)
+        ]),
+        
+        # Status indicators
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4("🌡️ Current Temperature", className="card-title"),
+                        html.H2(id="current-temp", children="--°C", 
+                               className="text-primary")
+                    ])
+                ], color="light")
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4("💧 Average Rainfall", className="card-title"),
+                        html.H2(id="avg-rainfall", children="--mm", 
+                               className="text-info")
+                    ])
+                ], color="light")
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4("🌧️ Active Regions", className="card-title"),
+                        html.H2(id="active-regions", children="--", 
+                               className="text-success")
+                    ])
+                ], color="light")
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4("⚠️ Warnings", className="card-title"),
+                        html.H2(id="warning-status", children="None", 
+                               className="text-warning")
+                    ])
+                ], color="light")
+            ], width=3)
+        ], className="mb-4"),
+        
+        # Control panel
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("Control Panel", className="card-title"),
+                        dbc.Row([
+                            dbc.Col([
+                                dbc.Button("🔄 Refresh Data", id="refresh-btn", 
+                                         color="primary", className="me-2"),
+                                dbc.Button("📊 Export Data", id="export-btn", 
+                                         color="secondary")
+                            ], width=6),
+                            dbc.Col([
+                                html.Label("Auto-refresh:", className="form-label"),
+                                dbc.Switch(id="auto-refresh", value=True, 
+                                         label="Enabled")
+                            ], width=6)
+                        ])
+                    ])
+                ])
+            ], width=12)
+        ], className="mb-4"),
+        
+        # Main charts
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Regional Rainfall Distribution"),
+                    dbc.CardBody([
+                        dcc.Graph(id="rainfall-bar-chart", 
+                                style={'height': '400px'})
+                    ])
+                ])
+            ], width=6),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Rainfall Intensity Map"),
+                    dbc.CardBody([
+                        dcc.Graph(id="rainfall-map",
+                                figure=get_visualizer().create_live_map_figure(),
+                                style={'height': '400px'})
+                    ])
+                ])
+            ], width=6)
+        ], className="mb-4"),
+        
+        # Time series and additional info
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Rainfall Trends (Last 24 Hours)"),
+                    dbc.CardBody([
+                        dcc.Graph(id="time-series-chart", 
+                                style={'height': '300px'})
+                    ])
+                ])
+            ], width=8),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Data Information"),
+                    dbc.CardBody([
+                        html.Div(id="data-info", 
+                               children="Loading data information...")
+                    ])
+                ])
+            ], width=4)
+        ], className="mb-4"),
+        
+        # Footer with auto-refresh
+        dbc.Row([
+            dbc.Col([
+                html.Hr(),
+                html.P([
+                    "Last updated: ",
+                    html.Span(id="last-updated", children="--"),
+                    html.Br(),
+                    "Data source: Hong Kong Observatory (HKO)",
+                    html.Br(),
+                    "⚡ Real-time updates every 5 minutes"
+                ], className="text-muted text-center")
+            ], width=12)
+        ])
+    )
+
 class RainfallDashboard:
     """Interactive web dashboard for Hong Kong rainfall data."""
     
@@ -27,150 +223,50 @@ class RainfallDashboard:
             __name__, 
             external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.FONT_AWESOME]
         )
-        self.fetcher = HKODataFetcher()
-        self.visualizer = RainfallVisualizer()
+        
+        # Gzip JSON callback responses and static assets
+        self.app.server.config['COMPRESS_MIMETYPES'] = [
+            'application/json', 'text/html', 'text/css', 'application/javascript'
+        ]
+        self.app.server.config['COMPRESS_LEVEL'] = 6
+        Compress(self.app.server)
+        self.visualizer = get_visualizer()
         self.update_interval = update_interval  # milliseconds
-        self.data_cache = {}
-        self.historical_data = []
+        
+        # All HKO fetching happens on the updater's background thread; the
+        # callbacks only read its latest result, so every tab shares one fetch.
+        # The dashboard draws its own figures, so the updater skips output/latest_*.html
+        self.updater = RealTimeUpdater(update_interval=self.update_interval / 60000,
+                                       render_outputs=False)
+        self.data_cache = {}  # key -> (stored_at, value)
+        self.cache_ttl = min(self.update_interval / 1000, 240)  # seconds
+        self._cache_lock = threading.Lock()
         
         self.setup_layout()
         self.setup_callbacks()
     
+    def _get_or_fetch(self, key: str, fetch_func, ttl: Optional[float] = None):
+        """Return the cached value for key, calling fetch_func only on a miss."""
+        ttl = self.cache_ttl if ttl is None else ttl
+        
+        entry = self.data_cache.get(key)
+        if entry and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+        
+        # Single-flight: concurrent callbacks on the same tick wait for one fetch
+        with self._cache_lock:
+            entry = self.data_cache.get(key)
+            if entry and time.monotonic() - entry[0] < ttl:
+                return entry[1]
+            
+            value = fetch_func()
+            self.data_cache[key] = (time.monotonic(), value)
+            return value
+    
     def setup_layout(self):
         """Setup the dashboard layout."""
         self.app.layout = dbc.Container([
-            # Header
-            dbc.Row([
-                dbc.Col([
-                    html.H1("香港降雨實時監測 Hong Kong Rainfall Monitor", 
-                           className="text-center mb-4",
-                           style={'color': '#2c3e50', 'fontWeight': 'bold'}),
-                    html.Hr()
-                ], width=12)
-            ]),
-            
-            # Status indicators
-            dbc.Row([
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardBody([
-                            html.H4("🌡️ Current Temperature", className="card-title"),
-                            html.H2(id="current-temp", children="--°C", 
-                                   className="text-primary")
-                        ])
-                    ], color="light")
-                ], width=3),
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardBody([
-                            html.H4("💧 Average Rainfall", className="card-title"),
-                            html.H2(id="avg-rainfall", children="--mm", 
-                                   className="text-info")
-                        ])
-                    ], color="light")
-                ], width=3),
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardBody([
-                            html.H4("🌧️ Active Regions", className="card-title"),
-                            html.H2(id="active-regions", children="--", 
-                                   className="text-success")
-                        ])
-                    ], color="light")
-                ], width=3),
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardBody([
-                            html.H4("⚠️ Warnings", className="card-title"),
-                            html.H2(id="warning-status", children="None", 
-                                   className="text-warning")
-                        ])
-                    ], color="light")
-                ], width=3)
-            ], className="mb-4"),
-            
-            # Control panel
-            dbc.Row([
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardBody([
-                            html.H5("Control Panel", className="card-title"),
-                            dbc.Row([
-                                dbc.Col([
-                                    dbc.Button("🔄 Refresh Data", id="refresh-btn", 
-                                             color="primary", className="me-2"),
-                                    dbc.Button("📊 Export Data", id="export-btn", 
-                                             color="secondary")
-                                ], width=6),
-                                dbc.Col([
-                                    html.Label("Auto-refresh:", className="form-label"),
-                                    dbc.Switch(id="auto-refresh", value=True, 
-                                             label="Enabled")
-                                ], width=6)
-                            ])
-                        ])
-                    ])
-                ], width=12)
-            ], className="mb-4"),
-            
-            # Main charts
-            dbc.Row([
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardHeader("Regional Rainfall Distribution"),
-                        dbc.CardBody([
-                            dcc.Graph(id="rainfall-bar-chart", 
-                                    style={'height': '400px'})
-                        ])
-                    ])
-                ], width=6),
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardHeader("Rainfall Intensity Map"),
-                        dbc.CardBody([
-                            html.Div(id="rainfall-map-container",
-                                   style={'height': '400px'})
-                        ])
-                    ])
-                ], width=6)
-            ], className="mb-4"),
-            
-            # Time series and additional info
-            dbc.Row([
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardHeader("Rainfall Trends (Last 24 Hours)"),
-                        dbc.CardBody([
-                            dcc.Graph(id="time-series-chart", 
-                                    style={'height': '300px'})
-                        ])
-                    ])
-                ], width=8),
-                dbc.Col([
-                    dbc.Card([
-                        dbc.CardHeader("Data Information"),
-                        dbc.CardBody([
-                            html.Div(id="data-info", 
-                                   children="Loading data information...")
-                        ])
-                    ])
-                ], width=4)
-            ], className="mb-4"),
-            
-            # Footer with auto-refresh
-            dbc.Row([
-                dbc.Col([
-                    html.Hr(),
-                    html.P([
-                        "Last updated: ",
-                        html.Span(id="last-updated", children="--"),
-                        html.Br(),
-                        "Data source: Hong Kong Observatory (HKO)",
-                        html.Br(),
-                        "⚡ Real-time updates every 5 minutes"
-                    ], className="text-muted text-center")
-                ], width=12)
-            ]),
+            *_static_layout_rows(),
             
             # Auto-refresh component
             dcc.Interval(
@@ -181,56 +277,73 @@ class RainfallDashboard:
             ),
             
             # Store components for data
-            dcc.Store(id='data-store'),
-            dcc.Store(id='historical-store', data=[])
+            # dynamic-store only carries what changes between fetches; the static
+            # district coordinates stay on the server. sync-store describes the
+            # samples the client's historical-store holds.
+            dcc.Store(id='dynamic-store'),
+            dcc.Store(id='sync-store'),
+            dcc.Store(id='historical-store', data={'t': [], 'avg': []}),
+            dcc.Store(id='map-store')
         ], fluid=True)
     
     def setup_callbacks(self):
         """Setup dashboard callbacks."""
+        # Bind hot references once so callbacks skip repeated attribute lookups
+        app = self.app
+        updater = self.updater
+        get_or_fetch = self._get_or_fetch
+        build_bar_chart = self.visualizer.create_rainfall_bar_chart
+        build_time_series = self.visualizer.create_time_series_chart
+        build_map_points = self.visualizer.get_map_points
+        log_error = logger.error
+        no_update = dash.no_update
         
-        @self.app.callback(
-            [Output('data-store', 'data'),
-             Output('historical-store', 'data')],
+        # Static district arrays are captured once instead of travelling with
+        # every update; each tick only aligns the new rainfall values to them
+        district_lat, district_lon, district_names = updater.fetcher.get_district_arrays()
+        align_rainfall = updater.fetcher.align_district_rainfall
+        
+        @app.callback(
+            [Output('dynamic-store', 'data'),
+             Output('historical-store', 'data'),
+             Output('sync-store', 'data')],
             [Input('interval-component', 'n_intervals'),
              Input('refresh-btn', 'n_clicks')],
-            [dash.dependencies.State('historical-store', 'data')]
+            [State('sync-store', 'data')]
         )
-        def update_data(n_intervals, refresh_clicks, historical_data):
-            """Fetch and update data."""
+        def update_data(n_intervals, refresh_clicks, synced):
+            """Publish the latest data and 24h history collected by the background updater."""
             try:
-                # Fetch new data
-                new_data = self.fetcher.fetch_all_data()
-                
-                # Update historical data
-                if historical_data is None:
-                    historical_data = []
+                # A manual refresh fetches immediately; clicks within the
+                # cache TTL share that one fetch
+                if ctx.triggered_id == 'refresh-btn':
+                    get_or_fetch('refresh', updater.fetch_and_store_data)
                 
-                # Add current data to history
-                historical_data.append({
-                    'timestamp': new_data['fetch_time'].isoformat(),
-                    'data': new_data
-                })
+                # The updater keeps every fetch, including those made between
+                # polls or while no tab was open
+                records = updater.get_historical_data()
+                if not records:
+                    return no_update, no_update, no_update
                 
-                # Keep only last 24 hours of data
-                cutoff_time = datetime.now() - timedelta(hours=24)
-                historical_data = [
-                    item for item in historical_data 
-                    if datetime.fromisoformat(item['timestamp']) > cutoff_time
-                ]
+                # Nothing is sent while the client already has the latest fetch
+                new_data = records[-1]['data']
+                if synced and synced.get('last') == _fetch_epoch(new_data):
+                    return no_update, no_update, no_update
                 
-                return new_data, historical_data
+                history, sync = _history_update(records, synced)
+                return new_data, history, sync
                 
             except Exception as e:
-                logger.error(f"Error updating data: {str(e)}")
-                return {}, []
+                log_error(f"Error updating data: {str(e)}")
+                return {}, {'t': [], 'avg': []}, None
         
-        @self.app.callback(
+        @app.callback(
             [Output('current-temp', 'children'),
              Output('avg-rainfall', 'children'),
              Output('active-regions', 'children'),
              Output('warning-status', 'children'),
              Output('last-updated', 'children')],
-            [Input('data-store', 'data')]
+            [Input('dynamic-store', 'data')]
         )
         def update_status_cards(data):
             """Update status indicator cards."""
@@ -238,43 +351,40 @@ class RainfallDashboard:
                 return "--°C", "--mm", "--", "No Data", "--"
             
             try:
+                current_weather, rainfall_data, weather_warnings = _unpack(data)
+                
                 # Temperature
-                temp = data.get('current_weather', {}).get('temperature', 0)
+                temp = current_weather.get('temperature', 0)
                 temp_str = f"{temp:.1f}°C" if temp else "--°C"
                 
                 # Average rainfall
-                avg_rain = data.get('rainfall_data', {}).get('average_rainfall', 0)
+                avg_rain = rainfall_data.get('average_rainfall', 0)
                 rain_str = f"{avg_rain:.1f}mm" if avg_rain else "--mm"
                 
-                # Active regions (regions with rainfall > 0)
-                regions = data.get('rainfall_data', {}).get('regions', {})
-                active_count = sum(1 for r in regions.values() 
-                                 if r.get('average_rainfall', 0) > 0)
-                total_count = len(regions)
+                # Active regions (regions with rainfall > 0), summarized at fetch time
+                active_count = rainfall_data.get('active_regions', 0)
+                total_count = rainfall_data.get('total_regions', 0)
                 active_str = f"{active_count}/{total_count}"
                 
                 # Warning status
-                warnings = data.get('weather_warnings', {}).get('active_warnings', [])
+                warnings = weather_warnings.get('active_warnings', [])
                 if warnings:
                     warning_str = f"{len(warnings)} Active"
                 else:
                     warning_str = "None"
                 
-                # Last updated
-                fetch_time = data.get('fetch_time', datetime.now())
-                if isinstance(fetch_time, str):
-                    fetch_time = datetime.fromisoformat(fetch_time.replace('Z', '+00:00'))
-                last_updated_str = fetch_time.strftime("%H:%M:%S")
+                # Last updated (formatted from the epoch, no ISO parsing)
+                last_updated_str = datetime.fromtimestamp(_fetch_epoch(data)).strftime("%H:%M:%S")
                 
                 return temp_str, rain_str, active_str, warning_str, last_updated_str
                 
             except Exception as e:
-                logger.error(f"Error updating status cards: {str(e)}")
+                log_error(f"Error updating status cards: {str(e)}")
                 return "--°C", "--mm", "--", "Error", "--"
         
-        @self.app.callback(
+        @app.callback(
             Output('rainfall-bar-chart', 'figure'),
-            [Input('data-store', 'data')]
+            [Input('dynamic-store', 'data')]
         )
         def update_bar_chart(data):
             """Update rainfall bar chart."""
@@ -282,71 +392,87 @@ class RainfallDashboard:
                 return go.Figure()
             
             try:
-                rainfall_data = data.get('rainfall_data', {})
-                return self.visualizer.create_rainfall_bar_chart(rainfall_data)
+                _, rainfall_data, _ = _unpack(data)
+                # The visualizer returns its cached figure for an unchanged snapshot
+                return build_bar_chart(rainfall_data)
             except Exception as e:
-                logger.error(f"Error updating bar chart: {str(e)}")
+                log_error(f"Error updating bar chart: {str(e)}")
                 return go.Figure()
         
-        @self.app.callback(
+        @app.callback(
             Output('time-series-chart', 'figure'),
             [Input('historical-store', 'data')]
         )
         def update_time_series(historical_data):
             """Update time series chart."""
-            if not historical_data:
+            if not historical_data or not historical_data.get('t'):
                 return go.Figure()
             
             try:
                 # Convert historical data format
-                processed_data = []
-                for item in historical_data:
-                    processed_data.append({
+                processed_data = [
+                    {
                         'rainfall_data': {
-                            'timestamp': datetime.fromisoformat(item['timestamp']),
-                            'average_rainfall': item['data'].get('rainfall_data', {}).get('average_rainfall', 0)
+                            'timestamp': datetime.fromtimestamp(epoch),
+                            'average_rainfall': avg
                         }
-                    })
-                
-                return self.visualizer.create_time_series_chart(processed_data)
+                    }
+                    for epoch, avg in zip(historical_data['t'], historical_data['avg'])
+                ]
+                return build_time_series(processed_data)
             except Exception as e:
-                logger.error(f"Error updating time series: {str(e)}")
+                log_error(f"Error updating time series: {str(e)}")
                 return go.Figure()
         
-        @self.app.callback(
-            Output('rainfall-map-container', 'children'),
-            [Input('data-store', 'data')]
+        @app.callback(
+            Output('map-store', 'data'),
+            [Input('dynamic-store', 'data')]
         )
         def update_map(data):
-            """Update rainfall map."""
+            """Reduce the latest data to the marker arrays drawn on the map."""
             if not data:
-                return html.Div("Loading map...")
+                return no_update
             
             try:
-                rainfall_data = data.get('rainfall_data', {})
-                district_coords = data.get('district_coordinates', {})
-                
-                # Create map
-                rainfall_map = self.visualizer.create_rainfall_map(
-                    rainfall_data, district_coords)
-                
-                # Convert to HTML string for embedding
-                map_html = rainfall_map._repr_html_()
-                
-                return html.Iframe(
-                    srcDoc=map_html,
-                    width="100%",
-                    height="400px",
-                    style={"border": "none"}
-                )
+                _, rainfall_data, _ = _unpack(data)
+                return build_map_points(
+                    district_lat, district_lon, district_names,
+                    align_rainfall(rainfall_data.get('regions', {})))
                 
             except Exception as e:
-                logger.error(f"Error updating map: {str(e)}")
-                return html.Div(f"Error loading map: {str(e)}")
+                log_error(f"Error updating map: {str(e)}")
+                return no_update
+        
+        # Only marker positions/colors cross the wire; the base map layer is
+        # built once in the layout and never re-rendered
+        app.clientside_callback(
+            """
+            function(points, figure) {
+                if (!points || !figure) {
+                    return window.dash_clientside.no_update;
+                }
+                const base = figure.data[0];
+                const trace = Object.assign({}, base, {
+                    lat: points.lat,
+                    lon: points.lon,
+                    text: points.names,
+                    customdata: points.rainfall,
+                    marker: Object.assign({}, base.marker, {
+                        color: points.colors,
+                        size: points.sizes
+                    })
+                });
+                return Object.assign({}, figure, {data: [trace]});
+            }
+            """,
+            Output('rainfall-map', 'figure'),
+            [Input('map-store', 'data')],
+            [State('rainfall-map', 'figure')]
+        )
         
-        @self.app.callback(
+        @app.callback(
             Output('data-info', 'children'),
-            [Input('data-store', 'data')]
+            [Input('dynamic-store', 'data')]
         )
         def update_data_info(data):
             """Update data information panel."""
@@ -354,11 +480,9 @@ class RainfallDashboard:
                 return "No data available"
             
             try:
-                rainfall_data = data.get('rainfall_data', {})
-                current_weather = data.get('current_weather', {})
-                warnings = data.get('weather_warnings', {})
+                current_weather, rainfall_data, warnings = _unpack(data)
                 
-                regions_count = len(rainfall_data.get('regions', {}))
+                regions_count = rainfall_data.get('total_regions', 0)
                 avg_rainfall = rainfall_data.get('average_rainfall', 0)
                 humidity = current_weather.get('humidity', 0)
                 warning_count = len(warnings.get('active_warnings', []))
@@ -378,10 +502,10 @@ class RainfallDashboard:
                 return info_content
                 
             except Exception as e:
-                logger.error(f"Error updating data info: {str(e)}")
+                log_error(f"Error updating data info: {str(e)}")
                 return f"Error: {str(e)}"
         
-        @self.app.callback(
+        @app.callback(
             Output('interval-component', 'disabled'),
             [Input('auto-refresh', 'value')]
         )
@@ -395,7 +519,16 @@ class RainfallDashboard:
         print(f"Dashboard will be available at: http://{host}:{port}")
         print(f"Auto-refresh interval: {self.update_interval/1000} seconds")
         
-        self.app.run(host=host, port=port, debug=debug)
+        # With debug on, werkzeug's reloader re-runs this in a child process that does
+        # the serving; only that process may fetch and write the historical log
+        serving = not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+        if serving:
+            self.updater.start_background_updates()
+        try:
+            self.app.run(host=host, port=port, debug=debug)
+        finally:
+            if serving:
+                self.updater.stop_background_updates()
 
 def main():
     """Run the dashboard."""
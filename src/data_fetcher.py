@@ -3,228 +3,403 @@ HKO Data Fetcher Module
 This module handles fetching real-time rainfall and weather data from the Hong Kong Observatory website.
 """
 
+import asyncio
+import html
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import pandas as pd
-import json
+import numpy as np
+import orjson
 import re
 from datetime import datetime, timedelta
 import time
+import threading
 import logging
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Regex patterns, compiled once at import
+_TEMP_RE = re.compile(r'(\d+\.?\d*)°C')
+_HUMIDITY_RE = re.compile(r'(\d+)%')
+# Rainfall lines look like "中西區1毫米" or "西貢0至5毫米"; one pass over the
+# text matches both single values and ranges
+_RAINFALL_RE = re.compile(
+    r'(?P<region>[中西東南北]+\s*區?|九龍城|葵青|荃灣|灣仔|離島區|西貢|沙田|大埔|屯門|元朗)'
+    r'\s*(?P<min>\d+)(?:\s*至\s*(?P<max>\d+))?\s*毫\s*米'
+)
+# Warning icons, e.g. "/images/warn/ts.png" or "warnrain.png?v=2"; no greedy .* to backtrack over
+_WARN_IMG_RE = re.compile(r'(?:^|/)warn[\w/-]*\.png(?:\?|$)')
+_WHITESPACE_RE = re.compile(r'\s+')
+# Longer keywords come first so a warning is not consumed as a bare '雨'
+_WEATHER_KEYWORDS_RE = re.compile(r'(雷暴警告|暴雨警告|驟雨|多雲|天晴|雨)')
+# Elements on the HKO main page that hold the current readings
+_TEMP_SELECTOR = 'span.tempNumber, .temp_c'
+_HUMIDITY_SELECTOR = 'span.rhNumber, .rh_c'
+_TAG_RE = re.compile(r'<[^>]+>')
+_CHARSET_RE = re.compile(rb'charset=["\']?([\w-]+)', re.IGNORECASE)
+
+# Traditional Chinese district names as they appear in HKO rainfall reports
+DISTRICT_NAMES_TC = {
+    'Central & Western': '中西區',
+    'Eastern': '東區',
+    'Southern': '南區',
+    'Wan Chai': '灣仔',
+    'Kowloon City': '九龍城',
+    'Kwun Tong': '觀塘',
+    'Sham Shui Po': '深水埗',
+    'Wong Tai Sin': '黃大仙',
+    'Yau Tsim Mong': '油尖旺',
+    'Islands': '離島區',
+    'Kwai Tsing': '葵青',
+    'North': '北區',
+    'Sai Kung': '西貢',
+    'Sha Tin': '沙田',
+    'Tai Po': '大埔',
+    'Tsuen Wan': '荃灣',
+    'Tuen Mun': '屯門',
+    'Yuen Long': '元朗'
+}
+
+# Hong Kong district coordinates (approximate centers), read-only and shared
+HK_DISTRICTS = MappingProxyType({
+    'Central & Western': {'lat': 22.2855, 'lon': 114.1577},
+    'Eastern': {'lat': 22.2783, 'lon': 114.2367},
+    'Southern': {'lat': 22.2461, 'lon': 114.1628},
+    'Wan Chai': {'lat': 22.2767, 'lon': 114.1759},
+    'Kowloon City': {'lat': 22.3251, 'lon': 114.1944},
+    'Kwun Tong': {'lat': 22.3127, 'lon': 114.2267},
+    'Sham Shui Po': {'lat': 22.3309, 'lon': 114.1639},
+    'Wong Tai Sin': {'lat': 22.3418, 'lon': 114.1946},
+    'Yau Tsim Mong': {'lat': 22.3093, 'lon': 114.1694},
+    'Islands': {'lat': 22.2587, 'lon': 113.9447},
+    'Kwai Tsing': {'lat': 22.3573, 'lon': 114.1378},
+    'North': {'lat': 22.4964, 'lon': 114.1476},
+    'Sai Kung': {'lat': 22.3816, 'lon': 114.2723},
+    'Sha Tin': {'lat': 22.3817, 'lon': 114.1973},
+    'Tai Po': {'lat': 22.4455, 'lon': 114.1645},
+    'Tsuen Wan': {'lat': 22.3736, 'lon': 114.1177},
+    'Tuen Mun': {'lat': 22.3943, 'lon': 113.9766},
+    'Yuen Long': {'lat': 22.4473, 'lon': 114.0305}
+})
+
+def _district_key(name: str) -> str:
+    """Normalize a Chinese district name, e.g. '中西 區' and '中西區' -> '中西'."""
+    return _WHITESPACE_RE.sub('', name).rstrip('區')
+
+# Keyword -> rainfall status, checked in priority order
+_KEYWORD_STATUS = {'雨': 'raining', '驟雨': 'raining', '暴雨警告': 'raining', '多雲': 'cloudy', '天晴': 'sunny'}
+_STATUS_PRIORITY = ('raining', 'cloudy', 'sunny')
+# Keyword -> warning reported in active_warnings
+_KEYWORD_WARNINGS = {'雷暴警告': 'thunderstorm', '暴雨警告': 'heavy_rain'}
+
+def _find_keywords(soup: BeautifulSoup) -> frozenset:
+    """Return the weather keywords present in a page, found in one pass over its text."""
+    return frozenset(match.group(1) for match in _WEATHER_KEYWORDS_RE.finditer(soup.get_text()))
+
+def _select_match(soup: BeautifulSoup, selector: str, pattern: re.Pattern) -> Optional[re.Match]:
+    """Search the element matching a CSS selector, falling back to scanning every text node."""
+    node = soup.select_one(selector)
+    if node is not None:
+        match = pattern.search(node.get_text())
+        if match:
+            return match
+    
+    # Page layout changed: scan the whole document as before
+    for text in soup.find_all(string=pattern):
+        match = pattern.search(text)
+        if match:
+            return match
+    return None
+
+def _page_charset(response: requests.Response, body: bytes) -> str:
+    """Return the page charset from the headers or <meta> tag, defaulting to UTF-8."""
+    # requests assumes ISO-8859-1 for text/html without a charset, which garbles Chinese text
+    match = (_CHARSET_RE.search(response.headers.get('content-type', '').encode('ascii', 'ignore'))
+             or _CHARSET_RE.search(body[:1024]))
+    return match.group(1).decode('ascii') if match else 'utf-8'
+
+def _decode_html(response: requests.Response, body: bytes) -> str:
+    """Decode a page body using its declared charset."""
+    try:
+        return body.decode(_page_charset(response, body), errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
 class HKODataFetcher:
     """Class to fetch real-time weather and rainfall data from HKO website."""
     
     def __init__(self):
         self.base_url = "https://www.hko.gov.hk"
         self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
         
-        # Hong Kong district coordinates (approximate centers)
-        self.hk_districts = {
-            'Central & Western': {'lat': 22.2855, 'lon': 114.1577},
-            'Eastern': {'lat': 22.2783, 'lon': 114.2367},
-            'Southern': {'lat': 22.2461, 'lon': 114.1628},
-            'Wan Chai': {'lat': 22.2767, 'lon': 114.1759},
-            'Kowloon City': {'lat': 22.3251, 'lon': 114.1944},
-            'Kwun Tong': {'lat': 22.3127, 'lon': 114.2267},
-            'Sham Shui Po': {'lat': 22.3309, 'lon': 114.1639},
-            'Wong Tai Sin': {'lat': 22.3418, 'lon': 114.1946},
-            'Yau Tsim Mong': {'lat': 22.3093, 'lon': 114.1694},
-            'Islands': {'lat': 22.2587, 'lon': 113.9447},
-            'Kwai Tsing': {'lat': 22.3573, 'lon': 114.1378},
-            'North': {'lat': 22.4964, 'lon': 114.1476},
-            'Sai Kung': {'lat': 22.3816, 'lon': 114.2723},
-            'Sha Tin': {'lat': 22.3817, 'lon': 114.1973},
-            'Tai Po': {'lat': 22.4455, 'lon': 114.1645},
-            'Tsuen Wan': {'lat': 22.3736, 'lon': 114.1177},
-            'Tuen Mun': {'lat': 22.3943, 'lon': 113.9766},
-            'Yuen Long': {'lat': 22.4473, 'lon': 114.0305}
+        # Pooled keep-alive connections to HKO, retrying transient server errors
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        
+        # Parsed pages keyed by URL, so rapid repeat calls share one download
+        self.page_cache_ttl = 30
+        self._page_cache = {}
+        self._page_locks = {}
+        
+        self.hk_districts = HK_DISTRICTS
+        
+        # The same districts as parallel arrays, built once for per-tick mapping
+        self._names = np.asarray(list(self.hk_districts), dtype=object)
+        self._lat = np.fromiter((coord['lat'] for coord in self.hk_districts.values()),
+                                dtype=np.float64, count=len(self.hk_districts))
+        self._lon = np.fromiter((coord['lon'] for coord in self.hk_districts.values()),
+                                dtype=np.float64, count=len(self.hk_districts))
+        self._district_index = {
+            _district_key(DISTRICT_NAMES_TC[name]): index
+            for index, name in enumerate(self._names)
         }
     
-    def fetch_current_weather(self) -> Dict:
-        """Fetch current weather data from HKO main page."""
-        try:
-            url = f"{self.base_url}/tc/index.html"
+    def _get_page(self, url: str) -> Tuple[BeautifulSoup, frozenset]:
+        """Download and parse a page, reusing a copy parsed within the last page_cache_ttl seconds.
+        
+        Returns the soup and the weather keywords in its text, so parsers sharing
+        the page also share the one pass over its text.
+        """
+        # One lock per URL: concurrent callers wait for a single download instead of racing
+        with self._page_locks.setdefault(url, threading.Lock()):
+            cached = self._page_cache.get(url)
+            if cached is not None and time.monotonic() - cached[0] < self.page_cache_ttl:
+                return cached[1], cached[2]
+            
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            weather_data = {
-                'timestamp': datetime.now(),
-                'temperature': None,
-                'humidity': None,
-                'rainfall_status': None,
-                'weather_conditions': None
-            }
-            
-            # Extract temperature
-            temp_elements = soup.find_all(text=re.compile(r'\d+\.?\d*°C'))
-            if temp_elements:
-                for temp in temp_elements:
-                    match = re.search(r'(\d+\.?\d*)°C', temp)
-                    if match:
-                        weather_data['temperature'] = float(match.group(1))
-                        break
-            
-            # Extract humidity
-            humidity_elements = soup.find_all(text=re.compile(r'\d+%'))
-            if humidity_elements:
-                for humidity in humidity_elements:
-                    match = re.search(r'(\d+)%', humidity)
-                    if match:
-                        weather_data['humidity'] = int(match.group(1))
-                        break
-            
-            # Extract weather conditions
-            weather_text = soup.get_text()
-            if '雨' in weather_text or '驟雨' in weather_text:
-                weather_data['rainfall_status'] = 'raining'
-            elif '多雲' in weather_text:
-                weather_data['rainfall_status'] = 'cloudy'
-            elif '天晴' in weather_text:
-                weather_data['rainfall_status'] = 'sunny'
-            else:
-                weather_data['rainfall_status'] = 'unknown'
-                
+            # Read the body once and name its charset so the parser skips encoding sniffing
+            body = response.content
+            soup = BeautifulSoup(body, 'lxml', from_encoding=_page_charset(response, body))
+            keywords = _find_keywords(soup)
+            self._page_cache[url] = (time.monotonic(), soup, keywords)
+            return soup, keywords
+    
+    def _parse_current_weather(self, soup: BeautifulSoup, keywords: frozenset, now: datetime) -> Dict:
+        """Extract current weather from a parsed HKO main page."""
+        weather_data = {
+            'timestamp': now,
+            'temperature': None,
+            'humidity': None,
+            'rainfall_status': None,
+            'weather_conditions': None
+        }
+        
+        # Extract temperature
+        match = _select_match(soup, _TEMP_SELECTOR, _TEMP_RE)
+        if match:
+            weather_data['temperature'] = float(match.group(1))
+        
+        # Extract humidity
+        match = _select_match(soup, _HUMIDITY_SELECTOR, _HUMIDITY_RE)
+        if match:
+            weather_data['humidity'] = int(match.group(1))
+        
+        # Extract weather conditions
+        statuses = {_KEYWORD_STATUS[keyword] for keyword in keywords
+                    if keyword in _KEYWORD_STATUS}
+        weather_data['rainfall_status'] = next(
+            (status for status in _STATUS_PRIORITY if status in statuses), 'unknown'
+        )
+        
+        return weather_data
+    
+    def fetch_current_weather(self, now: Optional[datetime] = None) -> Dict:
+        """Fetch current weather data from HKO main page."""
+        now = now or datetime.now()
+        try:
+            soup, keywords = self._get_page(f"{self.base_url}/tc/index.html")
+            weather_data = self._parse_current_weather(soup, keywords, now)
             logger.info(f"Current weather fetched: {weather_data}")
             return weather_data
             
         except Exception as e:
             logger.error(f"Error fetching current weather: {str(e)}")
-            return {'timestamp': datetime.now(), 'error': str(e)}
+            return {'timestamp': now, 'error': str(e)}
     
-    def fetch_rainfall_data(self) -> Dict:
+    def fetch_rainfall_data(self, now: Optional[datetime] = None) -> Dict:
         """Fetch detailed rainfall data from different regions."""
+        now = now or datetime.now()
         try:
             url = f"{self.base_url}/textonly/current/rainfall_sr_uc.htm"
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            # Stream the body in chunks rather than buffering it through response.content
+            with self.session.get(url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                body = b''.join(response.iter_content(chunk_size=8192))
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text_content = soup.get_text()
+            # The text-only page needs no DOM; strip the few tags and scan the text directly
+            text_content = html.unescape(_TAG_RE.sub('', _decode_html(response, body)))
             
             rainfall_data = {
-                'timestamp': datetime.now(),
+                'timestamp': now,
                 'regions': {},
                 'total_regions': 0,
-                'average_rainfall': 0
+                'active_regions': 0,
+                'average_rainfall': 0,
+                'max_rainfall': 0
             }
             
-            # Parse rainfall data using regex patterns
-            # Look for patterns like "中西區1毫米" or "西貢0至5毫米"
-            patterns = [
-                r'([中西東南北]+\s*[區]?)\s*(\d+)\s*毫\s*米',
-                r'([中西東南北]+\s*[區]?)\s*(\d+)\s*至\s*(\d+)\s*毫\s*米',
-                r'(九龍城|葵青|荃灣|灣仔|離島區|西貢|沙田|大埔|屯門|元朗)\s*(\d+)\s*至?\s*(\d+)?\s*毫\s*米'
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, text_content)
-                for match in matches:
-                    if len(match) == 2:  # Single value
-                        region, rainfall = match
-                        rainfall_data['regions'][region.strip()] = {
-                            'min_rainfall': float(rainfall),
-                            'max_rainfall': float(rainfall),
-                            'average_rainfall': float(rainfall)
-                        }
-                    elif len(match) == 3:  # Range value
-                        region, min_rain, max_rain = match
-                        if max_rain:
-                            avg_rain = (float(min_rain) + float(max_rain)) / 2
-                        else:
-                            avg_rain = float(min_rain)
-                        rainfall_data['regions'][region.strip()] = {
-                            'min_rainfall': float(min_rain),
-                            'max_rainfall': float(max_rain) if max_rain else float(min_rain),
-                            'average_rainfall': avg_rain
-                        }
+            # Parse rainfall data using regex patterns, accumulating the statistics
+            # in the same pass so consumers never rescan regions
+            regions = rainfall_data['regions']
+            total = peak = 0.0
+            active = 0
+            for match in _RAINFALL_RE.finditer(text_content):
+                region = match.group('region').strip()
+                if region in regions:
+                    # HKO lists each region once; ignoring repeats keeps the totals exact
+                    continue
+                min_rain = float(match.group('min'))
+                max_rain = float(match.group('max') or min_rain)
+                avg_rain = (min_rain + max_rain) / 2
+                regions[region] = {
+                    'min_rainfall': min_rain,
+                    'max_rainfall': max_rain,
+                    'average_rainfall': avg_rain
+                }
+                total += avg_rain
+                peak = max(peak, avg_rain)
+                active += avg_rain > 0
             
-            # Calculate statistics
-            if rainfall_data['regions']:
-                rainfall_data['total_regions'] = len(rainfall_data['regions'])
-                avg_values = [region['average_rainfall'] for region in rainfall_data['regions'].values()]
-                rainfall_data['average_rainfall'] = sum(avg_values) / len(avg_values)
+            if regions:
+                rainfall_data['total_regions'] = len(regions)
+                rainfall_data['active_regions'] = active
+                rainfall_data['average_rainfall'] = total / len(regions)
+                rainfall_data['max_rainfall'] = peak
             
             logger.info(f"Rainfall data fetched for {rainfall_data['total_regions']} regions")
             return rainfall_data
             
         except Exception as e:
             logger.error(f"Error fetching rainfall data: {str(e)}")
-            return {'timestamp': datetime.now(), 'error': str(e)}
+            return {'timestamp': now, 'error': str(e)}
     
-    def fetch_weather_warnings(self) -> Dict:
-        """Fetch current weather warnings and alerts."""
-        try:
-            url = f"{self.base_url}/tc/index.html"
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            warnings = {
-                'timestamp': datetime.now(),
-                'active_warnings': [],
-                'warning_level': 'none'
-            }
-            
-            # Look for warning indicators
-            warning_elements = soup.find_all('img', {'src': re.compile(r'warn.*\.png')})
-            for element in warning_elements:
-                src = element.get('src', '')
-                if 'ts' in src:  # Thunderstorm warning
-                    warnings['active_warnings'].append('thunderstorm')
-                    warnings['warning_level'] = 'high'
-                elif 'rain' in src:  # Rain warning
-                    warnings['active_warnings'].append('heavy_rain')
-                    warnings['warning_level'] = 'medium'
-                elif 'wind' in src:  # Wind warning
-                    warnings['active_warnings'].append('strong_wind')
-                    warnings['warning_level'] = 'medium'
-            
-            # Check text content for warning keywords
-            text_content = soup.get_text().lower()
-            if '雷暴警告' in text_content:
-                if 'thunderstorm' not in warnings['active_warnings']:
-                    warnings['active_warnings'].append('thunderstorm')
+    def _parse_warnings(self, soup: BeautifulSoup, keywords: frozenset, now: datetime) -> Dict:
+        """Extract active weather warnings from a parsed HKO main page."""
+        warnings = {
+            'timestamp': now,
+            'active_warnings': [],
+            'warning_level': 'none'
+        }
+        
+        # Look for warning indicators
+        warning_elements = soup.find_all('img', {'src': _WARN_IMG_RE})
+        for element in warning_elements:
+            src = element.get('src', '')
+            if 'ts' in src:  # Thunderstorm warning
+                warnings['active_warnings'].append('thunderstorm')
                 warnings['warning_level'] = 'high'
-            
-            if '暴雨警告' in text_content:
-                if 'heavy_rain' not in warnings['active_warnings']:
-                    warnings['active_warnings'].append('heavy_rain')
+            elif 'rain' in src:  # Rain warning
+                warnings['active_warnings'].append('heavy_rain')
+                warnings['warning_level'] = 'medium'
+            elif 'wind' in src:  # Wind warning
+                warnings['active_warnings'].append('strong_wind')
+                warnings['warning_level'] = 'medium'
+        
+        # Check text content for warning keywords
+        for keyword, warning in _KEYWORD_WARNINGS.items():
+            if keyword in keywords:
+                if warning not in warnings['active_warnings']:
+                    warnings['active_warnings'].append(warning)
                 warnings['warning_level'] = 'high'
-            
+        
+        return warnings
+    
+    def fetch_weather_warnings(self, now: Optional[datetime] = None) -> Dict:
+        """Fetch current weather warnings and alerts."""
+        now = now or datetime.now()
+        try:
+            soup, keywords = self._get_page(f"{self.base_url}/tc/index.html")
+            warnings = self._parse_warnings(soup, keywords, now)
             logger.info(f"Weather warnings: {warnings['active_warnings']}")
             return warnings
             
         except Exception as e:
             logger.error(f"Error fetching weather warnings: {str(e)}")
-            return {'timestamp': datetime.now(), 'error': str(e)}
+            return {'timestamp': now, 'error': str(e)}
+    
+    async def fetch_current_weather_async(self, now: Optional[datetime] = None) -> Dict:
+        """Fetch current weather data without blocking the event loop."""
+        return await asyncio.to_thread(self.fetch_current_weather, now)
+    
+    async def fetch_rainfall_data_async(self, now: Optional[datetime] = None) -> Dict:
+        """Fetch regional rainfall data without blocking the event loop."""
+        return await asyncio.to_thread(self.fetch_rainfall_data, now)
+    
+    async def fetch_weather_warnings_async(self, now: Optional[datetime] = None) -> Dict:
+        """Fetch weather warnings without blocking the event loop."""
+        return await asyncio.to_thread(self.fetch_weather_warnings, now)
+    
+    def get_district_coordinates(self) -> Mapping:
+        """Return the read-only Hong Kong district coordinates for mapping."""
+        return HK_DISTRICTS
     
-    def get_district_coordinates(self) -> Dict:
-        """Return Hong Kong district coordinates for mapping."""
-        return self.hk_districts.copy()
+    def get_district_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (lat, lon, names) arrays for the Hong Kong districts."""
+        return self._lat, self._lon, self._names
     
-    def fetch_all_data(self) -> Dict:
-        """Fetch all available weather and rainfall data."""
-        logger.info("Fetching all weather data from HKO...")
+    def align_district_rainfall(self, regions: Dict) -> np.ndarray:
+        """Return average rainfall aligned to get_district_arrays(), NaN where unreported."""
+        rainfall = np.full(self._names.size, np.nan)
+        for region_name, region_data in regions.items():
+            index = self._district_index.get(_district_key(region_name))
+            if index is not None:
+                rainfall[index] = region_data['average_rainfall']
+        return rainfall
+    
+    def fetch_all_data(self, now: Optional[datetime] = None) -> Dict:
+        """Fetch all available weather and rainfall data, timestamped with one shared `now`.
+        
+        Blocking wrapper around fetch_all_data_async for callers outside an event loop.
+        """
+        return asyncio.run(self.fetch_all_data_async(now=now))
+    
+    async def fetch_all_data_async(self, now: Optional[datetime] = None) -> Dict:
+        """Fetch all available data with the HKO requests issued concurrently."""
+        logger.info("Fetching all weather data from HKO (concurrent)...")
+        
+        # The requests run in parallel, so wall time is that of the slowest one.
+        # Weather and warnings both read /tc/index.html; the page cache makes
+        # that a single download and parse
+        fetch_time = now or datetime.now()
+        results = await asyncio.gather(
+            self.fetch_current_weather_async(fetch_time),
+            self.fetch_rainfall_data_async(fetch_time),
+            self.fetch_weather_warnings_async(fetch_time),
+            return_exceptions=True
+        )
+        
+        # A failing endpoint must not discard the results of the others
+        current_weather, rainfall_data, weather_warnings = [
+            {'timestamp': fetch_time, 'error': str(result)}
+            if isinstance(result, Exception) else result
+            for result in results
+        ]
         
         all_data = {
-            'fetch_time': datetime.now(),
-            'current_weather': self.fetch_current_weather(),
-            'rainfall_data': self.fetch_rainfall_data(),
-            'weather_warnings': self.fetch_weather_warnings(),
-            'district_coordinates': self.get_district_coordinates()
+            'fetch_time': fetch_time,
+            'fetch_time_epoch': fetch_time.timestamp(),
+            'current_weather': current_weather,
+            'rainfall_data': rainfall_data,
+            'weather_warnings': weather_warnings
         }
         
         return all_data
@@ -237,15 +412,12 @@ class HKODataFetcher:
         
         filepath = f"data/{filename}"
         
-        # Convert datetime objects to strings for JSON serialization
-        def convert_datetime(obj):
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
-        
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2, default=convert_datetime)
+            # orjson writes UTF-8 and serializes datetime and numpy values natively
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(
+                    data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+                ))
             
             logger.info(f"Data saved to {filepath}")
             return filepath
@@ -253,6 +425,11 @@ class HKODataFetcher:
             logger.error(f"Error saving data: {str(e)}")
             return ""
 
+@lru_cache(maxsize=1)
+def get_fetcher() -> HKODataFetcher:
+    """Return the shared fetcher so its HTTP session is reused across callers."""
+    return HKODataFetcher()
+
 def main():
     """Test the data fetcher."""
     fetcher = HKODataFetcher()
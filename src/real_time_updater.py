@@ -3,133 +3,216 @@ Real-time Data Updater for Hong Kong Rainfall Monitor
 This module handles scheduled data updates and background data collection.
 """
 
-import schedule
+import asyncio
 import time
-import json
+import math
 import os
+import queue
+from collections import deque
 from datetime import datetime, timedelta
 import threading
 import logging
+import orjson
 from typing import Dict, List, Optional
 
-from data_fetcher import HKODataFetcher
-from visualizer import RainfallVisualizer
+from data_fetcher import HK_DISTRICTS, get_fetcher
+from visualizer import get_visualizer
 
 logger = logging.getLogger(__name__)
 
+# One JSON object per line; orjson writes datetimes as ISO strings natively
+_JSONL_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+
 class RealTimeUpdater:
     """Background service for real-time data updates."""
     
-    def __init__(self, update_interval: int = 5, data_dir: str = "data"):
+    def __init__(self, update_interval: int = 5, data_dir: str = "data", keep_snapshots: bool = False,
+                 render_outputs: bool = True):
         self.update_interval = update_interval  # minutes
         self.data_dir = data_dir
-        self.fetcher = HKODataFetcher()
-        self.visualizer = RainfallVisualizer()
+        self.keep_snapshots = keep_snapshots  # Also write each fetch to current_data_*.json
+        self.render_outputs = render_outputs  # Write output/latest_*.html after each fetch
+        self.fetcher = get_fetcher()
+        self.visualizer = get_visualizer()
         self.is_running = False
         self.update_thread = None
+        self._stop_event = threading.Event()  # Set to wake and end the update loop
+        # Serializes updates, e.g. a dashboard Refresh racing the update thread, so
+        # records are appended in time order and the log is written by one thread
+        self._update_lock = threading.Lock()
+        self._history_lock = threading.Lock()  # Guards historical_data against readers on other threads
+        
+        # Figures are rendered on their own thread so slow rendering never delays a fetch;
+        # the single slot holds only the newest pending (data, history) snapshot
+        self._render_q = queue.Queue(maxsize=1)
+        self._render_thread = None
+        self._render_lock = threading.Lock()
+        self.data_ready = threading.Event()  # Set after each successful update
         
         # Ensure data directory exists
         os.makedirs(data_dir, exist_ok=True)
         os.makedirs("output", exist_ok=True)
         
-        # Historical data storage
-        self.historical_file = os.path.join(data_dir, "historical_data.json")
+        # Historical data storage: an append-only JSON Lines log backed by a
+        # fixed-size in-memory window of the last 24 hours
+        self.historical_file = os.path.join(data_dir, "historical_data.jsonl")
+        self.legacy_historical_file = os.path.join(data_dir, "historical_data.json")
+        self.history_size = max(1, math.ceil(24 * 60 / update_interval))
+        self._file_records = 0  # Lines currently in historical_file
         self.historical_data = self.load_historical_data()
+        # Rewrite the log without expired or unreadable lines, or create it from imported records
+        if self._file_records != len(self.historical_data):
+            self.compact_historical_data()
+        if os.path.exists(self.legacy_historical_file) and os.path.exists(self.historical_file):
+            # Keep the pre-JSON Lines history file, but out of the way of future loads
+            os.replace(self.legacy_historical_file, self.legacy_historical_file + '.migrated')
     
-    def load_historical_data(self) -> List[Dict]:
-        """Load historical data from file."""
+    def load_historical_data(self) -> deque:
+        """Load the last 24 hours of historical data from the JSON Lines log."""
+        history = deque(maxlen=self.history_size)
+        cutoff_time = datetime.now() - timedelta(hours=24)
         try:
             if os.path.exists(self.historical_file):
-                with open(self.historical_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Filter data to last 24 hours
-                    cutoff_time = datetime.now() - timedelta(hours=24)
-                    filtered_data = []
-                    for item in data:
-                        timestamp = datetime.fromisoformat(item['timestamp'])
-                        if timestamp > cutoff_time:
-                            filtered_data.append(item)
-                    return filtered_data
-            return []
+                with open(self.historical_file, 'rb') as f:
+                    for line_number, line in enumerate(f, 1):
+                        if not line.strip():
+                            continue
+                        # Counted even if unreadable, so the log is compacted without it
+                        self._file_records += 1
+                        try:
+                            item = orjson.loads(line)
+                            # Keep timestamps as datetime in memory, matching freshly fetched records
+                            item['timestamp'] = datetime.fromisoformat(item['timestamp'])
+                        except (orjson.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                            logger.warning(f"Skipping unreadable historical record on line {line_number}: {str(e)}")
+                            continue
+                        if item['timestamp'] > cutoff_time:
+                            history.append(item)
+            elif os.path.exists(self.legacy_historical_file):
+                history.extend(self._load_legacy_historical_data(cutoff_time))
+            return history
         except Exception as e:
             logger.error(f"Error loading historical data: {str(e)}")
-            return []
+            return history
+    
+    def _load_legacy_historical_data(self, cutoff_time: datetime) -> List[Dict]:
+        """Read records newer than cutoff_time from the historical_data.json array used before the JSON Lines log."""
+        with open(self.legacy_historical_file, 'rb') as f:
+            legacy = orjson.loads(f.read())
+        
+        records = []
+        for item in legacy:
+            item['timestamp'] = datetime.fromisoformat(item['timestamp'])
+            if item['timestamp'] > cutoff_time:
+                records.append(item)
+        
+        logger.info(f"Importing {len(records)} records from {self.legacy_historical_file}")
+        return records
     
-    def save_historical_data(self):
-        """Save historical data to file."""
+    def save_historical_data(self, record: Dict):
+        """Append one historical record to the JSON Lines log."""
         try:
-            # Convert datetime objects to strings
-            serializable_data = []
-            for item in self.historical_data:
-                serializable_item = item.copy()
-                if 'timestamp' in serializable_item and isinstance(serializable_item['timestamp'], datetime):
-                    serializable_item['timestamp'] = serializable_item['timestamp'].isoformat()
-                if 'data' in serializable_item:
-                    # Handle nested datetime objects
-                    data_copy = self._convert_datetimes_to_strings(serializable_item['data'])
-                    serializable_item['data'] = data_copy
-                serializable_data.append(serializable_item)
-            
-            with open(self.historical_file, 'w', encoding='utf-8') as f:
-                json.dump(serializable_data, f, ensure_ascii=False, indent=2)
+            with open(self.historical_file, 'ab') as f:
+                f.write(orjson.dumps(record, option=_JSONL_OPTIONS))
+            self._file_records += 1
             
-            logger.info(f"Historical data saved: {len(serializable_data)} records")
+            # Rewrite the log from memory once it holds twice the retained window
+            if self._file_records >= 2 * self.history_size:
+                self.compact_historical_data()
         except Exception as e:
             logger.error(f"Error saving historical data: {str(e)}")
     
-    def _convert_datetimes_to_strings(self, obj):
-        """Recursively convert datetime objects to strings."""
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        elif isinstance(obj, dict):
-            return {key: self._convert_datetimes_to_strings(value) for key, value in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_datetimes_to_strings(item) for item in obj]
-        else:
-            return obj
+    def compact_historical_data(self):
+        """Rewrite the JSON Lines log so it only holds the in-memory records."""
+        try:
+            temp_file = self.historical_file + '.tmp'
+            with open(temp_file, 'wb') as f:
+                for item in self.historical_data:
+                    f.write(orjson.dumps(item, option=_JSONL_OPTIONS))
+            os.replace(temp_file, self.historical_file)
+            self._file_records = len(self.historical_data)
+            
+            logger.info(f"Historical data compacted: {self._file_records} records")
+        except Exception as e:
+            logger.error(f"Error compacting historical data: {str(e)}")
     
     def fetch_and_store_data(self):
         """Fetch current data and add to historical storage."""
-        try:
-            logger.info("Fetching new data...")
-            
-            # Fetch current data
-            current_data = self.fetcher.fetch_all_data()
-            
-            # Add to historical data
-            self.historical_data.append({
-                'timestamp': current_data['fetch_time'],
-                'data': current_data
-            })
-            
-            # Keep only last 24 hours
-            cutoff_time = datetime.now() - timedelta(hours=24)
-            self.historical_data = [
-                item for item in self.historical_data 
-                if item['timestamp'] > cutoff_time
-            ]
-            
-            # Save current data
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            current_file = os.path.join(self.data_dir, f"current_data_{timestamp}.json")
-            self.fetcher.save_data_to_file(current_data, f"current_data_{timestamp}.json")
-            
-            # Save historical data
-            self.save_historical_data()
-            
-            # Create latest visualizations
-            self.create_latest_visualizations(current_data)
-            
-            logger.info(f"Data update completed. Historical records: {len(self.historical_data)}")
+        with self._update_lock:
+            try:
+                logger.info("Fetching new data...")
+                now = datetime.now()  # One clock read timestamps the whole update
+                
+                # Fetch current data (HKO requests overlap instead of running serially)
+                current_data = asyncio.run(self.fetcher.fetch_all_data_async(now=now))
+                
+                # Add to historical data
+                record = {
+                    'timestamp': current_data['fetch_time'],
+                    'data': current_data
+                }
+                with self._history_lock:
+                    self.historical_data.append(record)
+                    
+                    # Keep only last 24 hours; records are in time order, so only the front can expire
+                    cutoff_time = now - timedelta(hours=24)
+                    while self.historical_data and self.historical_data[0]['timestamp'] <= cutoff_time:
+                        self.historical_data.popleft()
+                
+                # The historical log already holds every fetch; per-fetch snapshots are for debugging
+                if self.keep_snapshots:
+                    timestamp = now.strftime("%Y%m%d_%H%M%S")
+                    self.fetcher.save_data_to_file(current_data, f"current_data_{timestamp}.json")
+                
+                # Save historical data
+                self.save_historical_data(record)
+                
+                # Hand the latest visualizations to the render thread
+                if self.render_outputs:
+                    self._queue_render(current_data, list(self.historical_data))
+                
+                logger.info(f"Data update completed. Historical records: {len(self.historical_data)}")
+                self.data_ready.set()
+                
+            except Exception as e:
+                logger.error(f"Error in fetch_and_store_data: {str(e)}")
+    
+    def _queue_render(self, data: Dict, history: List[Dict]):
+        """Queue a render of the latest visualizations, replacing any render still pending."""
+        with self._render_lock:
+            if self._render_thread is None or not self._render_thread.is_alive():
+                self._render_thread = threading.Thread(target=self._render_worker, daemon=True)
+                self._render_thread.start()
             
-        except Exception as e:
-            logger.error(f"Error in fetch_and_store_data: {str(e)}")
+            while True:
+                try:
+                    self._render_q.put_nowait((data, history))
+                    return
+                except queue.Full:
+                    # Drop the stale snapshot; the worker may have taken it already
+                    try:
+                        self._render_q.get_nowait()
+                        self._render_q.task_done()
+                    except queue.Empty:
+                        pass
+    
+    def _render_worker(self):
+        """Render queued snapshots until the None sentinel arrives."""
+        while True:
+            item = self._render_q.get()
+            try:
+                if item is None:
+                    return
+                self.create_latest_visualizations(*item)
+            finally:
+                self._render_q.task_done()
     
-    def create_latest_visualizations(self, data: Dict):
+    def create_latest_visualizations(self, data: Dict, history: Optional[List[Dict]] = None):
         """Create and save latest visualizations."""
+        if history is None:
+            history = list(self.historical_data)
+        
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
             # Create bar chart
             bar_chart = self.visualizer.create_rainfall_bar_chart(data['rainfall_data'])
             self.visualizer.save_interactive_chart(
@@ -137,7 +220,7 @@ class RealTimeUpdater:
             
             # Create map
             rainfall_map = self.visualizer.create_rainfall_map(
-                data['rainfall_data'], data['district_coordinates'])
+                data['rainfall_data'], HK_DISTRICTS)
             self.visualizer.save_map(rainfall_map, f"latest_rainfall_map.html", "output")
             
             # Create dashboard
@@ -146,10 +229,10 @@ class RealTimeUpdater:
                 dashboard_chart, f"latest_dashboard.html", "output")
             
             # Create time series if we have historical data
-            if len(self.historical_data) > 1:
+            if len(history) > 1:
                 # Convert historical data for visualizer
                 viz_historical_data = []
-                for item in self.historical_data:
+                for item in history:
                     viz_item = {
                         'rainfall_data': {
                             'timestamp': item['timestamp'],
@@ -174,20 +257,18 @@ class RealTimeUpdater:
             return
         
         self.is_running = True
-        
-        # Schedule regular updates
-        schedule.every(self.update_interval).minutes.do(self.fetch_and_store_data)
+        self._stop_event.clear()
         
         # Initial data fetch
         self.fetch_and_store_data()
         
-        def run_schedule():
-            while self.is_running:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
+        def run_updates():
+            # Sleep exactly one interval between updates; stop() wakes the wait early
+            while not self._stop_event.wait(self.update_interval * 60):
+                self.fetch_and_store_data()
         
-        # Start scheduler in background thread
-        self.update_thread = threading.Thread(target=run_schedule, daemon=True)
+        # Start update loop in background thread
+        self.update_thread = threading.Thread(target=run_updates, daemon=True)
         self.update_thread.start()
         
         logger.info(f"Background updates started (interval: {self.update_interval} minutes)")
@@ -195,9 +276,22 @@ class RealTimeUpdater:
     def stop_background_updates(self):
         """Stop background data updates."""
         self.is_running = False
-        schedule.clear()
+        self._stop_event.set()
         if self.update_thread:
             self.update_thread.join(timeout=5)
+        
+        # A fetch can outlive the join above; wait for it so it cannot queue a render
+        # (and start a new render thread) after the sentinel
+        with self._update_lock:
+            # Let the render thread finish the pending snapshot, then exit
+            with self._render_lock:
+                if self._render_thread is not None and self._render_thread.is_alive():
+                    try:
+                        self._render_q.put(None, timeout=30)
+                        self._render_thread.join(timeout=30)
+                    except queue.Full:
+                        logger.warning("Render thread still busy; leaving it to exit with the process")
+                self._render_thread = None
         logger.info("Background updates stopped")
     
     def get_latest_data(self) -> Optional[Dict]:
@@ -209,32 +303,34 @@ class RealTimeUpdater:
     def get_historical_data(self, hours: int = 24) -> List[Dict]:
         """Get historical data for specified number of hours."""
         cutoff_time = datetime.now() - timedelta(hours=hours)
-        return [
-            item for item in self.historical_data 
-            if item['timestamp'] > cutoff_time
-        ]
+        with self._history_lock:
+            return [
+                item for item in self.historical_data 
+                if item['timestamp'] > cutoff_time
+            ]
     
     def cleanup_old_files(self, days: int = 7):
         """Clean up old data files."""
         try:
             cutoff_time = datetime.now() - timedelta(days=days)
             
-            for filename in os.listdir(self.data_dir):
-                if filename.startswith('current_data_') and filename.endswith('.json'):
-                    filepath = os.path.join(self.data_dir, filename)
-                    file_time = datetime.fromtimestamp(os.path.getctime(filepath))
-                    if file_time < cutoff_time:
-                        os.remove(filepath)
-                        logger.info(f"Deleted old file: {filename}")
+            cutoff = cutoff_time.timestamp()
+            
+            # scandir entries carry their stat result, avoiding a getctime call per file
+            with os.scandir(self.data_dir) as entries:
+                for entry in entries:
+                    if (entry.name.startswith('current_data_') and entry.name.endswith('.json')
+                            and entry.is_file() and entry.stat().st_ctime < cutoff):
+                        os.remove(entry.path)
+                        logger.info(f"Deleted old file: {entry.name}")
             
             # Clean up old output files
-            for filename in os.listdir("output"):
-                if filename.endswith('.html') and not filename.startswith('latest_'):
-                    filepath = os.path.join("output", filename)
-                    file_time = datetime.fromtimestamp(os.path.getctime(filepath))
-                    if file_time < cutoff_time:
-                        os.remove(filepath)
-                        logger.info(f"Deleted old output file: {filename}")
+            with os.scandir("output") as entries:
+                for entry in entries:
+                    if (entry.name.endswith('.html') and not entry.name.startswith('latest_')
+                            and entry.is_file() and entry.stat().st_ctime < cutoff):
+                        os.remove(entry.path)
+                        logger.info(f"Deleted old output file: {entry.name}")
                         
         except Exception as e:
             logger.error(f"Error cleaning up old files: {str(e)}")
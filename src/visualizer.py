@@ -5,23 +5,157 @@ This module creates dynamic charts and maps for Hong Kong rainfall visualization
 
 import plotly.graph_objects as go
 import plotly.express as px
+import plotly.io as pio
 from plotly.subplots import make_subplots
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
 import folium
 from folium import plugins
+import atexit
 import json
 import logging
+import threading
+import warnings
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 
+from data_fetcher import DISTRICT_NAMES_TC, _district_key
+
 logger = logging.getLogger(__name__)
 
+# Encode figure JSON (HTML exports, Dash responses) with orjson, which writes numpy arrays natively
+pio.json.config.default_engine = 'orjson'
+
+# Severity plotted for each warning type in the weather dashboard
+_WARNING_LEVELS = {'thunderstorm': 3, 'heavy_rain': 2, 'strong_wind': 1}
+
+# Time series longer than this are downsampled before plotting
+_MAX_SERIES_POINTS = 2000
+
+# Marker colors from dry to very heavy rain, indexed by _rainfall_color_indices;
+# amounts at or above each threshold move up one color, exactly 0 stays gray
+_RAINFALL_COLORS = ('gray', 'green', 'blue', 'orange', 'red')
+_RAINFALL_COLOR_NAMES = np.array(_RAINFALL_COLORS)
+_RAINFALL_THRESHOLDS = np.array([0, 1, 5, 10], dtype=np.float64)
+_PIE_THRESHOLDS = np.array([0, 2], dtype=np.float64)
+
+# Leaflet builds each rainfall marker in the browser from a compact
+# [lat, lon, amount, color_index, popup_html] row
+_MARKER_CALLBACK = """
+function (row) {
+    var color = %s[row[3]];
+    return L.circleMarker([row[0], row[1]], {
+        radius: Math.max(5, Math.min(20, row[2] * 2)),
+        color: color, fillColor: color, fillOpacity: 0.6, weight: 2
+    }).bindPopup(row[4], {maxWidth: 200});
+}
+""" % json.dumps(_RAINFALL_COLORS)
+
+# Serializes PNG exports: once kaleido's sync server runs, every export shares its
+# single task/result queue pair, so overlapping calls could swap images
+_static_export_lock = threading.Lock()
+_static_export_warm = False
+
+def _render_png(fig: go.Figure) -> bytes:
+    """Render a figure to PNG, keeping the kaleido renderer running after the first success."""
+    global _static_export_warm
+    with _static_export_lock:
+        png = pio.to_image(fig, format='png', width=1200, height=800, scale=2, validate=False)
+        if not _static_export_warm:
+            # Only start the shared renderer once an export has worked: its worker
+            # thread cannot report a missing browser and callers would block
+            try:
+                import kaleido
+                kaleido.start_sync_server(silence_warnings=True)
+                atexit.register(kaleido.stop_sync_server, silence_warnings=True)
+                # plotly always passes kopts, which the server ignores and warns about
+                warnings.filterwarnings('ignore', message='The kopts argument is ignored',
+                                        category=UserWarning)
+            except (ImportError, AttributeError):
+                pass  # kaleido 0.x already reuses its subprocess
+            _static_export_warm = True
+    return png
+
+def _as_datetime(value) -> datetime:
+    """Return a timestamp as datetime, accepting the ISO strings stored in JSON."""
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+def _bucketize(amounts: np.ndarray, thresholds: np.ndarray, side: str = 'right') -> np.ndarray:
+    """Return the bucket index of each amount against ascending thresholds.
+    
+    With side='right' an amount equal to a threshold moves into the bucket above it,
+    with side='left' it stays in the bucket below.
+    """
+    return np.searchsorted(thresholds, amounts, side=side)
+
+def _linear_trend(xs: np.ndarray, ys: np.ndarray) -> Tuple[float, float]:
+    """Return the (slope, intercept) of the least-squares line through the points."""
+    x_mean, y_mean = xs.mean(), ys.mean()
+    x_centered = xs - x_mean
+    spread = float(np.dot(x_centered, x_centered))
+    slope = float(np.dot(x_centered, ys - y_mean)) / spread if spread else 0.0
+    return slope, float(y_mean - slope * x_mean)
+
+def _rainfall_color_indices(amounts: np.ndarray) -> np.ndarray:
+    """Return the _RAINFALL_COLORS index for each rainfall amount."""
+    return np.where(amounts == 0, 0, _bucketize(amounts, _RAINFALL_THRESHOLDS))
+
+def _regions_key(rainfall_data: Dict) -> tuple:
+    """Summarize rainfall data as a hashable (timestamp, per-region averages) key."""
+    regions = rainfall_data.get('regions') or {}
+    return (rainfall_data.get('timestamp'),
+            tuple((name, region['average_rainfall']) for name, region in regions.items()))
+
+def _downsample(xs: np.ndarray, ys: np.ndarray, max_points: int = _MAX_SERIES_POINTS) -> np.ndarray:
+    """Return indices of at most max_points samples chosen by Largest-Triangle-Three-Buckets.
+    
+    xs must be in ascending order. The first and last points are always kept; every
+    bucket in between keeps the point forming the largest triangle with the previously
+    kept point and the next bucket's average, so peaks survive the reduction.
+    """
+    n = len(xs)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    
+    # max_points - 2 buckets over the interior points 1 .. n-2
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.intp)
+    indices = np.empty(max_points, dtype=np.intp)
+    indices[0], indices[-1] = 0, n - 1
+    
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x, next_y = xs[end:next_end].mean(), ys[end:next_end].mean()
+        
+        areas = np.abs((xs[previous] - next_x) * (ys[start:end] - ys[previous])
+                       - (xs[previous] - xs[start:end]) * (next_y - ys[previous]))
+        previous = start + int(areas.argmax())
+        indices[bucket + 1] = previous
+    
+    return indices
+
 class RainfallVisualizer:
     """Class for creating dynamic visualizations of Hong Kong rainfall data."""
     
+    _POPUP_TMPL = "<b>{name}</b><br>Rainfall: {avg:.1f}mm<br>Range: {lo:.1f} - {hi:.1f}mm"
+    _LEGEND_HTML = '''
+        <div style="position: fixed; 
+                    bottom: 50px; left: 50px; width: 150px; height: 120px; 
+                    background-color: white; border:2px solid grey; z-index:9999; 
+                    font-size:14px; padding: 10px">
+        <p><b>Rainfall Legend</b></p>
+        <p><i class="fa fa-circle" style="color:gray"></i> No rain</p>
+        <p><i class="fa fa-circle" style="color:green"></i> Light (< 1mm)</p>
+        <p><i class="fa fa-circle" style="color:blue"></i> Moderate (1-5mm)</p>
+        <p><i class="fa fa-circle" style="color:orange"></i> Heavy (5-10mm)</p>
+        <p><i class="fa fa-circle" style="color:red"></i> Very Heavy (> 10mm)</p>
+        </div>
+    '''
+    
     def __init__(self):
         self.color_scale = [
             [0.0, '#ffffff'],    # White - No rain
@@ -39,12 +173,42 @@ class RainfallVisualizer:
             'lon_min': 113.83, 'lon_max': 114.41
         }
         
-        # Set matplotlib style
-        plt.style.use('seaborn-v0_8')
-        sns.set_palette("husl")
+        # Recently built figures keyed on the data they show, shared read-only with callers
+        self._fig_cache = OrderedDict()
+        self._fig_cache_size = 8
+        self._fig_lock = threading.Lock()
+        
+        # Normalized district name -> [lat, lon] index over the last district_coords mapping seen
+        self._district_index: Dict[str, List[float]] = {}
+        self._district_index_source = None
+    
+    def _cached_figure(self, key: tuple, builder) -> go.Figure:
+        """Return the figure cached under key, building it with builder() on a miss."""
+        with self._fig_lock:
+            fig = self._fig_cache.get(key)
+            if fig is not None:
+                self._fig_cache.move_to_end(key)
+                return fig
+        
+        fig = builder()
+        with self._fig_lock:
+            self._fig_cache[key] = fig
+            while len(self._fig_cache) > self._fig_cache_size:
+                self._fig_cache.popitem(last=False)
+        return fig
     
     def create_rainfall_bar_chart(self, rainfall_data: Dict) -> go.Figure:
-        """Create an interactive bar chart of rainfall by region."""
+        """Create an interactive bar chart of rainfall by region.
+        
+        Figures are cached per data snapshot and shared; copy one before mutating it.
+        """
+        return self._cached_figure(
+            ('bar', _regions_key(rainfall_data)),
+            lambda: self._build_rainfall_bar_chart(rainfall_data)
+        )
+    
+    def _build_rainfall_bar_chart(self, rainfall_data: Dict) -> go.Figure:
+        """Build the rainfall bar chart figure."""
         try:
             if 'regions' not in rainfall_data or not rainfall_data['regions']:
                 # Create empty chart with message
@@ -59,23 +223,18 @@ class RainfallVisualizer:
                 return fig
             
             regions = list(rainfall_data['regions'].keys())
-            rainfall_amounts = [rainfall_data['regions'][region]['average_rainfall'] 
-                              for region in regions]
-            
-            # Create color scale based on rainfall intensity
-            max_rainfall = max(rainfall_amounts) if rainfall_amounts else 1
-            colors = ['rgb({},{},{})'.format(
-                max(0, 255 - int(amount/max_rainfall * 200)),
-                max(0, 255 - int(amount/max_rainfall * 150)),
-                255
-            ) for amount in rainfall_amounts]
+            rainfall_amounts = np.fromiter(
+                (region['average_rainfall'] for region in rainfall_data['regions'].values()),
+                dtype=np.float64, count=len(regions)
+            )
             
+            # Plotly maps the raw amounts through the colorscale, scaled from dry to the wettest region
             fig = go.Figure(data=[
                 go.Bar(
                     x=regions,
                     y=rainfall_amounts,
-                    marker_color=colors,
-                    text=[f'{amount:.1f}mm' for amount in rainfall_amounts],
+                    marker=dict(color=rainfall_amounts, colorscale=self.color_scale, cmin=0),
+                    texttemplate='%{y:.1f}mm',
                     textposition='auto',
                     hovertemplate='<b>%{x}</b><br>Rainfall: %{y:.1f}mm<extra></extra>'
                 )
@@ -83,7 +242,7 @@ class RainfallVisualizer:
             
             fig.update_layout(
                 title={
-                    'text': f'Hong Kong Rainfall by Region<br><sub>Last updated: {rainfall_data["timestamp"].strftime("%Y-%m-%d %H:%M:%S")}</sub>',
+                    'text': f'Hong Kong Rainfall by Region<br><sub>Last updated: {_as_datetime(rainfall_data["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")}</sub>',
                     'x': 0.5,
                     'xanchor': 'center'
                 },
@@ -99,9 +258,78 @@ class RainfallVisualizer:
             return fig
             
         except Exception as e:
-            logger.error(f"Error creating rainfall bar chart: {str(e)}")
+            logger.error("Error creating rainfall bar chart: %s", e)
             return go.Figure()
     
+    def _get_district_index(self, district_coords: Dict) -> Dict[str, List[float]]:
+        """Return the district name -> coordinates index for district_coords, building it on first use.
+        
+        Districts are indexed under their normalized English and Chinese names, the
+        same keys the fetcher uses to align rainfall to the live map.
+        """
+        if district_coords is not self._district_index_source:
+            index = {}
+            for district, coord in district_coords.items():
+                coords = [coord['lat'], coord['lon']]
+                index[_district_key(district)] = coords
+                if district in DISTRICT_NAMES_TC:
+                    index[_district_key(DISTRICT_NAMES_TC[district])] = coords
+            self._district_index = index
+            self._district_index_source = district_coords
+        return self._district_index
+    
+    def _find_region_coords(self, region_name: str, district_coords: Dict) -> List[float]:
+        """Find map coordinates for a rainfall region."""
+        coords = self._get_district_index(district_coords).get(_district_key(region_name))
+        if coords:
+            return list(coords)
+        
+        # Use approximate coordinates if exact match not found, offset by a stable
+        # hash of the name so a region lands in the same place on every render
+        h = zlib.crc32(region_name.encode('utf-8'))
+        return [22.3193 + ((h & 0xFFFF) / 0xFFFF - 0.5) * 0.2,
+                114.1694 + ((h >> 16) / 0xFFFF - 0.5) * 0.2]
+    
+    def get_map_points(self, lat: np.ndarray, lon: np.ndarray, names: np.ndarray,
+                       rainfall: np.ndarray) -> Dict[str, List]:
+        """Reduce aligned district arrays to the marker arrays used by the live map.
+        
+        Districts whose rainfall is NaN (not reported) are left off the map.
+        """
+        reported = ~np.isnan(rainfall)
+        rainfall = rainfall[reported]
+        
+        return {
+            'lat': lat[reported].tolist(),
+            'lon': lon[reported].tolist(),
+            'names': names[reported].tolist(),
+            'rainfall': rainfall.tolist(),
+            'colors': _RAINFALL_COLOR_NAMES[_rainfall_color_indices(rainfall)].tolist(),
+            'sizes': np.clip(rainfall * 4, 10, 40).tolist()
+        }
+    
+    def create_live_map_figure(self) -> go.Figure:
+        """Create the base map figure whose markers are filled in client-side."""
+        fig = go.Figure(go.Scattermap(
+            lat=[], lon=[],
+            mode='markers',
+            marker=dict(size=[], color=[], opacity=0.6),
+            hovertemplate='<b>%{text}</b><br>Rainfall: %{customdata:.1f}mm<extra></extra>'
+        ))
+        
+        fig.update_layout(
+            map=dict(
+                style='open-street-map',
+                center=dict(lat=22.3193, lon=114.1694),
+                zoom=9.5
+            ),
+            margin=dict(l=0, r=0, t=0, b=0),
+            showlegend=False,
+            uirevision='rainfall-map'  # Keep the user's pan/zoom across updates
+        )
+        
+        return fig
+    
     def create_rainfall_map(self, rainfall_data: Dict, district_coords: Dict) -> folium.Map:
         """Create an interactive map showing rainfall distribution."""
         try:
@@ -120,76 +348,33 @@ class RainfallVisualizer:
                 ).add_to(hk_map)
                 return hk_map
             
-            # Calculate max rainfall for color scaling
-            max_rainfall = max([region['average_rainfall'] 
-                              for region in rainfall_data['regions'].values()])
-            
-            # Add markers for each region with rainfall data
-            for region_name, region_data in rainfall_data['regions'].items():
-                # Try to find coordinates for this region
-                coords = None
-                for district, coord in district_coords.items():
-                    if any(keyword in region_name for keyword in district.split()):
-                        coords = [coord['lat'], coord['lon']]
-                        break
-                
-                # Use approximate coordinates if exact match not found
-                if coords is None:
-                    coords = [22.3193 + np.random.uniform(-0.1, 0.1), 
-                             114.1694 + np.random.uniform(-0.1, 0.1)]
-                
+            # One data row per region; the markers themselves are built client-side
+            regions = rainfall_data['regions']
+            amounts = np.fromiter((region['average_rainfall'] for region in regions.values()),
+                                  dtype=np.float64, count=len(regions))
+            color_indices = _rainfall_color_indices(amounts).tolist()
+            
+            rows = []
+            for (region_name, region_data), color_index in zip(regions.items(), color_indices):
+                lat, lon = self._find_region_coords(region_name, district_coords)
                 rainfall_amount = region_data['average_rainfall']
-                
-                # Determine marker color based on rainfall intensity
-                if rainfall_amount == 0:
-                    color = 'gray'
-                elif rainfall_amount < 1:
-                    color = 'green'
-                elif rainfall_amount < 5:
-                    color = 'blue'
-                elif rainfall_amount < 10:
-                    color = 'orange'
-                else:
-                    color = 'red'
-                
-                # Create popup text
-                popup_text = f"""
-                <b>{region_name}</b><br>
-                Rainfall: {rainfall_amount:.1f}mm<br>
-                Range: {region_data['min_rainfall']:.1f} - {region_data['max_rainfall']:.1f}mm
-                """
-                
-                folium.CircleMarker(
-                    location=coords,
-                    radius=max(5, min(20, rainfall_amount * 2)),
-                    popup=folium.Popup(popup_text, max_width=200),
-                    color=color,
-                    fill=True,
-                    fillColor=color,
-                    fillOpacity=0.6,
-                    weight=2
-                ).add_to(hk_map)
+                popup_text = self._POPUP_TMPL.format_map({
+                    'name': region_name,
+                    'avg': rainfall_amount,
+                    'lo': region_data['min_rainfall'],
+                    'hi': region_data['max_rainfall']
+                })
+                rows.append([lat, lon, rainfall_amount, color_index, popup_text])
+            
+            plugins.FastMarkerCluster(data=rows, callback=_MARKER_CALLBACK).add_to(hk_map)
             
             # Add legend
-            legend_html = '''
-            <div style="position: fixed; 
-                        bottom: 50px; left: 50px; width: 150px; height: 120px; 
-                        background-color: white; border:2px solid grey; z-index:9999; 
-                        font-size:14px; padding: 10px">
-            <p><b>Rainfall Legend</b></p>
-            <p><i class="fa fa-circle" style="color:gray"></i> No rain</p>
-            <p><i class="fa fa-circle" style="color:green"></i> Light (< 1mm)</p>
-            <p><i class="fa fa-circle" style="color:blue"></i> Moderate (1-5mm)</p>
-            <p><i class="fa fa-circle" style="color:orange"></i> Heavy (5-10mm)</p>
-            <p><i class="fa fa-circle" style="color:red"></i> Very Heavy (> 10mm)</p>
-            </div>
-            '''
-            hk_map.get_root().html.add_child(folium.Element(legend_html))
+            hk_map.get_root().html.add_child(folium.Element(self._LEGEND_HTML))
             
             return hk_map
             
         except Exception as e:
-            logger.error(f"Error creating rainfall map: {str(e)}")
+            logger.error("Error creating rainfall map: %s", e)
             return folium.Map(location=[22.3193, 114.1694], zoom_start=11)
     
     def create_time_series_chart(self, historical_data: List[Dict]) -> go.Figure:
@@ -207,10 +392,16 @@ class RainfallVisualizer:
                 return fig
             
             # Extract timestamps and average rainfall
-            timestamps = [data['rainfall_data']['timestamp'] for data in historical_data 
-                         if 'rainfall_data' in data and 'timestamp' in data['rainfall_data']]
-            avg_rainfall = [data['rainfall_data']['average_rainfall'] for data in historical_data 
-                           if 'rainfall_data' in data and 'average_rainfall' in data['rainfall_data']]
+            # in one pass, so a record missing either field cannot misalign the two lists
+            timestamps = []
+            avg_rainfall = []
+            add_timestamp = timestamps.append
+            add_rainfall = avg_rainfall.append
+            for data in historical_data:
+                rainfall_data = data.get('rainfall_data')
+                if rainfall_data and 'timestamp' in rainfall_data and 'average_rainfall' in rainfall_data:
+                    add_timestamp(rainfall_data['timestamp'])
+                    add_rainfall(rainfall_data['average_rainfall'])
             
             if not timestamps or not avg_rainfall:
                 fig = go.Figure()
@@ -225,10 +416,19 @@ class RainfallVisualizer:
             
             fig = go.Figure()
             
+            # Typed arrays go to WebGL traces as-is, keeping long histories responsive
+            times = [_as_datetime(timestamp) for timestamp in timestamps]
+            x_values = np.array(times, dtype='datetime64[us]')
+            x_numeric = np.fromiter((t.timestamp() for t in times), dtype=np.float64, count=len(times))
+            y_values = np.asarray(avg_rainfall, dtype=np.float64)
+            
+            # Plot at most _MAX_SERIES_POINTS points; the trend is still fitted on all of them
+            shown = _downsample(x_numeric, y_values)
+            
             # Add line plot
-            fig.add_trace(go.Scatter(
-                x=timestamps,
-                y=avg_rainfall,
+            fig.add_trace(go.Scattergl(
+                x=x_values[shown],
+                y=y_values[shown],
                 mode='lines+markers',
                 name='Average Rainfall',
                 line=dict(color='blue', width=2),
@@ -239,12 +439,11 @@ class RainfallVisualizer:
             # Add trend line if enough data points
             if len(timestamps) > 2:
                 # Simple linear trend
-                x_numeric = pd.to_datetime(timestamps).astype(np.int64) / 10**9
-                z = np.polyfit(x_numeric, avg_rainfall, 1)
-                trend_line = np.poly1d(z)(x_numeric)
+                slope, intercept = _linear_trend(x_numeric, y_values)
+                trend_line = intercept + slope * x_numeric[shown]
                 
-                fig.add_trace(go.Scatter(
-                    x=timestamps,
+                fig.add_trace(go.Scattergl(
+                    x=x_values[shown],
                     y=trend_line,
                     mode='lines',
                     name='Trend',
@@ -263,17 +462,33 @@ class RainfallVisualizer:
                 height=400,
                 plot_bgcolor='rgba(0,0,0,0)',
                 paper_bgcolor='rgba(0,0,0,0)',
-                hovermode='x unified'
+                hovermode='x'
             )
             
             return fig
             
         except Exception as e:
-            logger.error(f"Error creating time series chart: {str(e)}")
+            logger.error("Error creating time series chart: %s", e)
             return go.Figure()
     
     def create_weather_dashboard(self, all_data: Dict) -> go.Figure:
-        """Create a comprehensive weather dashboard."""
+        """Create a comprehensive weather dashboard.
+        
+        Figures are cached per data snapshot and shared; copy one before mutating it.
+        """
+        current_weather = all_data.get('current_weather') or {}
+        key = (
+            'dashboard',
+            datetime.now().strftime("%Y-%m-%d %H:%M"),  # Shown in the title
+            _regions_key(all_data.get('rainfall_data') or {}),
+            current_weather.get('temperature'),
+            current_weather.get('humidity'),
+            tuple((all_data.get('weather_warnings') or {}).get('active_warnings') or ())
+        )
+        return self._cached_figure(key, lambda: self._build_weather_dashboard(all_data))
+    
+    def _build_weather_dashboard(self, all_data: Dict) -> go.Figure:
+        """Build the weather dashboard figure."""
         try:
             # Create subplots
             fig = make_subplots(
@@ -312,26 +527,29 @@ class RainfallVisualizer:
                 }
             ), row=1, col=1)
             
+            # Single pass over the regions, shared by the bar and pie charts
+            regions = rainfall_data.get('regions') or {}
+            names = list(regions)
+            amounts = np.fromiter((r['average_rainfall'] for r in regions.values()),
+                                  dtype=np.float64, count=len(regions))
+            
             # 2. Rainfall bar chart
-            if rainfall_data.get('regions'):
-                regions = list(rainfall_data['regions'].keys())[:8]  # Limit for visibility
-                rainfall_amounts = [rainfall_data['regions'][region]['average_rainfall'] 
-                                  for region in regions]
-                
+            if names:
                 fig.add_trace(go.Bar(
-                    x=regions,
-                    y=rainfall_amounts,
+                    x=names[:8],  # Limit for visibility
+                    y=amounts[:8],
                     name="Rainfall",
                     marker_color='lightblue'
                 ), row=1, col=2)
             
             # 3. Warnings scatter plot (timeline)
             if warnings.get('active_warnings'):
-                warning_levels = {'thunderstorm': 3, 'heavy_rain': 2, 'strong_wind': 1}
-                x_vals = list(range(len(warnings['active_warnings'])))
-                y_vals = [warning_levels.get(w, 1) for w in warnings['active_warnings']]
+                active_warnings = warnings['active_warnings']
+                y_vals = np.fromiter((_WARNING_LEVELS.get(w, 1) for w in active_warnings),
+                                     dtype=np.int8, count=len(active_warnings))
+                x_vals = np.arange(len(active_warnings), dtype=np.int16)
                 
-                fig.add_trace(go.Scatter(
+                fig.add_trace(go.Scattergl(
                     x=x_vals,
                     y=y_vals,
                     mode='markers+text',
@@ -342,13 +560,10 @@ class RainfallVisualizer:
                 ), row=2, col=1)
             
             # 4. Regional statistics pie chart
-            if rainfall_data.get('regions'):
-                dry_regions = sum(1 for r in rainfall_data['regions'].values() 
-                                if r['average_rainfall'] == 0)
-                light_rain = sum(1 for r in rainfall_data['regions'].values() 
-                               if 0 < r['average_rainfall'] <= 2)
-                heavy_rain = sum(1 for r in rainfall_data['regions'].values() 
-                               if r['average_rainfall'] > 2)
+            if names:
+                # 0 -> dry, (0, 2] -> light, > 2 -> heavy
+                buckets = _bucketize(amounts, _PIE_THRESHOLDS, side='left')
+                dry_regions, light_rain, heavy_rain = np.bincount(buckets, minlength=3)[:3].tolist()
                 
                 fig.add_trace(go.Pie(
                     labels=['Dry', 'Light Rain', 'Heavy Rain'],
@@ -369,7 +584,7 @@ class RainfallVisualizer:
             return fig
             
         except Exception as e:
-            logger.error(f"Error creating weather dashboard: {str(e)}")
+            logger.error("Error creating weather dashboard: %s", e)
             return go.Figure()
     
     def save_static_chart(self, fig: go.Figure, filename: str, 
@@ -377,23 +592,25 @@ class RainfallVisualizer:
         """Save a plotly figure as a static image."""
         try:
             filepath = f"{output_dir}/{filename}"
-            fig.write_image(filepath, width=1200, height=800, scale=2)
-            logger.info(f"Chart saved to {filepath}")
+            Path(filepath).write_bytes(_render_png(fig))
+            logger.info("Chart saved to %s", filepath)
             return filepath
         except Exception as e:
-            logger.error(f"Error saving chart: {str(e)}")
+            logger.error("Error saving chart: %s", e)
             return ""
     
     def save_interactive_chart(self, fig: go.Figure, filename: str, 
-                              output_dir: str = "output") -> str:
-        """Save a plotly figure as an interactive HTML file."""
+                              output_dir: str = "output", full_html: bool = True) -> str:
+        """Save a plotly figure as an interactive HTML file, or a <div> fragment if full_html is False."""
         try:
             filepath = f"{output_dir}/{filename}"
-            fig.write_html(filepath, include_plotlyjs='cdn')
-            logger.info(f"Interactive chart saved to {filepath}")
+            # Figures were validated as they were built; skip re-walking the spec on save
+            fig.write_html(filepath, include_plotlyjs='cdn', validate=False,
+                           full_html=full_html, config={'responsive': True})
+            logger.info("Interactive chart saved to %s", filepath)
             return filepath
         except Exception as e:
-            logger.error(f"Error saving interactive chart: {str(e)}")
+            logger.error("Error saving interactive chart: %s", e)
             return ""
     
     def save_map(self, map_obj: folium.Map, filename: str, 
@@ -402,15 +619,20 @@ class RainfallVisualizer:
         try:
             filepath = f"{output_dir}/{filename}"
             map_obj.save(filepath)
-            logger.info(f"Map saved to {filepath}")
+            logger.info("Map saved to %s", filepath)
             return filepath
         except Exception as e:
-            logger.error(f"Error saving map: {str(e)}")
+            logger.error("Error saving map: %s", e)
             return ""
 
+@lru_cache(maxsize=1)
+def get_visualizer() -> RainfallVisualizer:
+    """Return the shared visualizer instance."""
+    return RainfallVisualizer()
+
 def main():
     """Test the visualizer."""
-    from data_fetcher import HKODataFetcher
+    from data_fetcher import HK_DISTRICTS, HKODataFetcher
     
     print("Testing Rainfall Visualizer...")
     print("=" * 50)
@@ -430,7 +652,7 @@ def main():
     print("3. Creating map...")
     rainfall_map = visualizer.create_rainfall_map(
         all_data['rainfall_data'], 
-        all_data['district_coordinates']
+        HK_DISTRICTS
     )
     
     print("4. Creating dashboard...")